@@ -102,17 +102,16 @@ class Path_Generator:
             g = np.array(goal)
             distance = np.sqrt((cp[0] - g[0]) ** 2 + (cp[1] - g[1]) ** 2)
             samples = int(round(distance / self.ss))
+            if samples == 0:
+                continue
 
             # Don't include the start location but do include the end point
-            for j in range(0, samples):
-                x = cp[0] + ((j + 1) * self.ss) * np.cos(g[2])
-                y = cp[1] + ((j + 1) * self.ss) * np.sin(g[2])
-                a = g[2]
-                try:
-                    coords[i].append((x, y, a))
-                except:
-                    coords[i] = []
-                    coords[i].append((x, y, a))
+            steps = np.arange(1, samples + 1) * self.ss
+            points = np.empty((samples, 3))
+            points[:, 0] = cp[0] + steps * np.cos(g[2])
+            points[:, 1] = cp[1] + steps * np.sin(g[2])
+            points[:, 2] = g[2]
+            coords[i] = points
         self.samples = coords
         return self.samples, self.samples
 
@@ -121,7 +120,7 @@ class Path_Generator:
         Input:
             current_pose (tuple of x, y, z, a which are floats) current location of the robot in world coordinates
         Output:
-            paths (dictionary of frontier keys and sample points)
+            paths (dictionary of frontier keys and sample points, each an nparray of (x, y, a) rows)
         """
         self.cp = current_pose
         self.generate_frontier_points()
@@ -197,7 +196,7 @@ class Dubins_Path_Generator(Path_Generator):
                 if len(ttemp) < 2:
                     pass
                 else:
-                    sampling_path[i] = ttemp
+                    sampling_path[i] = np.array(ttemp)
                     true_path[i] = ftemp[0 : ftemp.index(ttemp[-1]) + 1]
             except:
                 pass
@@ -266,6 +265,9 @@ class Dubins_EqualPath_Generator(Path_Generator):
                 else:
                     ftemp.append(c)
             true_path[key] = ftemp
+
+        for key, path in list(coords.items()):
+            coords[key] = np.array(path)
         return coords, true_coords
 
 
@@ -344,7 +346,7 @@ class Reachable_Frontier_Generator:
                     if len(ttemp) < 2:
                         pass
                     else:
-                        sampling_path[i] = ttemp
+                        sampling_path[i] = np.array(ttemp)
                         true_path[i] = ftemp[0 : ftemp.index(ttemp[-1]) + 1]
                 except:
                     pass
@@ -418,7 +420,7 @@ class Reachable_Step_Generator(Reachable_Frontier_Generator):
             if len(temp) < 2:
                 pass
             else:
-                sampling_path[i] = temp
+                sampling_path[i] = np.array(temp)
 
             ftemp = []
             for c in fconfig:
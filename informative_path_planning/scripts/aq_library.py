@@ -42,7 +42,7 @@ def info_gain(time, xvals, robot_model, param=None):
 
     # If the robot hasn't taken any observations yet, simply return the entropy of the potential set
     if xobs is None:
-        Sigma_after = robot_model.kern.K(queries)
+        Sigma_after = robot_model.kern_K(queries)
         entropy_after, sign_after = np.linalg.slogdet(
             np.eye(Sigma_after.shape[0], Sigma_after.shape[1])
             + robot_model.variance * Sigma_after
@@ -53,8 +53,8 @@ def info_gain(time, xvals, robot_model, param=None):
     all_data = np.vstack([xobs, queries])
 
     # The covariance matrices of the previous observations and combined observations respectively
-    Sigma_before = robot_model.kern.K(xobs)
-    Sigma_total = robot_model.kern.K(all_data)
+    Sigma_before = robot_model.kern_K(xobs)
+    Sigma_total = robot_model.kern_K(all_data)
 
     # The term H(y_a, y_obs)
     entropy_before, sign_before = np.linalg.slogdet(
@@ -84,6 +84,42 @@ def info_gain(time, xvals, robot_model, param=None):
     return entropy_total - entropy_const
 
 
+def info_gain_points(time, xvals, robot_model, param=None):
+    """The info_gain of each point in xvals as its own one-point path, returning NUM_PTS rewards. By the
+    Schur complement, adding one query to the observations only multiplies the determinant by its
+    conditional variance, so all queries share one cholesky factorization of the observation covariance"""
+    queries = np.array(xvals)[:, :2]
+    Kqq = robot_model.kern_Kdiag(queries)
+    xobs = robot_model.xvals
+
+    # If the robot hasn't taken any observations yet, simply return the entropy of each query
+    if xobs is None:
+        return 0.5 * np.log(1.0 + robot_model.variance * Kqq)
+
+    # det(I + v Sigma_total) = det(I + v Sigma_before) * (1 + v k_qq - v^2 k_q^T (I + v Sigma_before)^{-1} k_q)
+    L = np.linalg.cholesky(
+        np.eye(xobs.shape[0]) + robot_model.variance * robot_model.kern_K(xobs)
+    )
+    W = sp.linalg.solve_triangular(
+        L, robot_model.variance * robot_model.kern_K(xobs, queries), lower=True
+    )
+    schur = 1.0 + robot_model.variance * Kqq - np.sum(W**2, axis=0)
+
+    # The same scaling of the entropy difference as info_gain, with entropy_const = 0
+    return 2 * np.pi * np.e * np.log(schur)
+
+
+def hotspot_info_UCB_points(time, xvals, robot_model, param=None):
+    """The hotspot_info_UCB of each point in xvals as its own one-point path, returning NUM_PTS rewards"""
+    queries = np.array(xvals)[:, :2]
+    mu, var = robot_model.predict_value(queries)
+
+    # With LAMBDA = 1.0 the exploitation terms are those of mean_UCB
+    return info_gain_points(time, queries, robot_model) + mean_UCB_moments(
+        time, mu.reshape(1, -1), var.reshape(1, -1)
+    )
+
+
 def mean_UCB(time, xvals, robot_model, param=None):
     """Computes the UCB for a set of points along a trajectory"""
     data = np.array(xvals)
@@ -98,12 +134,18 @@ def mean_UCB(time, xvals, robot_model, param=None):
     # print mu - mu_test
     # print var - var_test
 
+    return mean_UCB_moments(time, mu, var, param)[0]
+
+
+def mean_UCB_moments(time, mu, var, param=None):
+    """The UCB of mean_UCB computed from posterior predictions, where mu and var are NUM_PTS x NUM_PATHS
+    arrays holding the points of each path in a column; returns the NUM_PATHS rewards"""
     delta = 0.9
     d = 20
     pit = np.pi**2 * (time + 1) ** 2 / 6.0
     beta_t = 2 * np.log(d * pit / delta)
 
-    return np.sum(mu) + np.sqrt(beta_t) * np.sum(np.fabs(var))
+    return np.sum(mu, axis=0) + np.sqrt(beta_t) * np.sum(np.fabs(var), axis=0)
 
 
 def hotspot_info_UCB(time, xvals, robot_model, param=None):
@@ -358,16 +400,26 @@ def mves(time, xvals, robot_model, param):
 
     d = queries.shape[1]  # The dimension of the points (should be 2D)
 
+    # Compute the posterior mean/variance predictions and gradients; they do not depend on the sampled max.
+    # [meanVector, varVector, meangrad, vargrad] = mean_var(x, xx, ...
+    #    yy, KernelMatrixInv{i}, l(i,:), sigma(i), sigma0(i));
+    mean, var = robot_model.predict_value(queries)
+    return mves_moments(time, mean, var, param)[0]
+
+
+def mves_moments(time, mu, var, param):
+    """The MES reward of mves computed from posterior predictions, where mu and var are NUM_PTS x NUM_PATHS
+    arrays holding the points of each path in a column; returns the NUM_PATHS rewards"""
+    maxes = param[0]
+    # If no max values are provided, return default value
+    if maxes is None:
+        return np.ones(mu.shape[1])
+
     # Initialize f, g
     f = 0
     for i in range(maxes.shape[0]):
-        # Compute the posterior mean/variance predictions and gradients.
-        # [meanVector, varVector, meangrad, vargrad] = mean_var(x, xx, ...
-        #    yy, KernelMatrixInv{i}, l(i,:), sigma(i), sigma0(i));
-        mean, var = robot_model.predict_value(queries)
-
         # Compute the acquisition function of MES.
-        gamma = (maxes[i] - mean) / var
+        gamma = (maxes[i] - mu) / var
         pdfgamma = sp.stats.norm.pdf(gamma)
         cdfgamma = sp.stats.norm.cdf(gamma)
         utility = gamma * pdfgamma / (2.0 * cdfgamma) - np.log(cdfgamma)
@@ -379,11 +431,10 @@ def mves(time, xvals, robot_model, param):
         # if np.sum(utility) == 0.000:
         #    pdb.set_trace()
 
-        f += sum(utility)
+        f += np.sum(utility, axis=0)
     # Average f
     f = f / maxes.shape[0]
-    # f is an np array; return scalar value
-    return f[0]
+    return f
 
 
 """
@@ -597,21 +648,25 @@ def exp_improvement(time, xvals, robot_model, param=None):
     queries = np.vstack([x1, x2]).T
 
     mu, var = robot_model.predict_value(queries)
-    avg_reward = 0
+    return exp_improvement_moments(time, mu, var, param)[0]
+
 
+def exp_improvement_moments(time, mu, var, param=None):
+    """The expected improvement of exp_improvement computed from posterior predictions, where mu and var are
+    NUM_PTS x NUM_PATHS arrays holding the points of each path in a column; returns the NUM_PATHS rewards"""
     if param == None:
         eta = 0.5
     else:
         eta = sum(param) / len(param)
 
     # z = (np.sum(mu)-eta)/np.sum(np.fabs(var))
-    x = [m - eta for m in mu]
-    x = np.sum(x)
-    z = x / np.sum(np.fabs(var))
+    x = np.sum(mu - eta, axis=0)
+    abs_var = np.sum(np.fabs(var), axis=0)
+    z = x / abs_var
     big_phi = 0.5 * (1 + sp.special.erf(z / np.sqrt(2)))
     small_phi = 1 / np.sqrt(2 * np.pi) * np.exp(-(z**2) / 2)
     avg_reward = (
-        x * big_phi + np.sum(np.fabs(var)) * small_phi
+        x * big_phi + abs_var * small_phi
     )  # (np.sum(mu)-eta)*big_phi + np.sum(np.fabs(var))*small_phi
 
     return avg_reward
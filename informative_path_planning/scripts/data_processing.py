@@ -1,7 +1,12 @@
 # !/usr/bin/python
 
+import hashlib
 import math
+import mmap
 import os
+import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
 
 import aq_library as aqlib
 import gpmodel_library as gplib
@@ -14,6 +19,11 @@ import scipy as sp
 from matplotlib import cm
 from matplotlib.colors import LogNorm
 
+try:
+    import pyarrow.csv as pacsv
+except ImportError:
+    pacsv = None
+
 plt.rcParams["xtick.labelsize"] = 32
 plt.rcParams["ytick.labelsize"] = 32
 plt.rcParams["axes.labelsize"] = 40
@@ -21,123 +31,120 @@ plt.rcParams["axes.titlesize"] = 40
 plt.rcParams["figure.figsize"] = (17, 10)
 
 
-def make_df(file_names, sample_names, max_vals, column_names):
-    d = file_names[0]
-    d_samp_file = sample_names[0]
-    d_max_vals = max_vals[0]
+def read_table(path):
+    """Read a space delimited results file with pyarrow's multithreaded parser,
+    or with np.loadtxt when pyarrow is not installed.
+    Extra footer rows are left in place; callers slice them off in memory.
+    """
+    if pacsv is None:
+        return pd.DataFrame(np.loadtxt(path, delimiter=" ", ndmin=2))
+    data = pacsv.read_csv(
+        path,
+        read_options=pacsv.ReadOptions(autogenerate_column_names=True),
+        parse_options=pacsv.ParseOptions(delimiter=" "),
+    ).to_pandas()
+    data.columns = range(data.shape[1])
+    return data
+
 
-    data = pd.read_table(d, delimiter=" ", header=None)
+def read_samples(path):
+    """Read a robot_model file as a NUM_PTS x 3 array of (x1, x2, z) rows.
+    New runs save it with np.save; older runs wrote a 3 x NUM_PTS text file.
+    """
+    if path.endswith(".npy"):
+        return np.load(path)
+    return read_table(path).to_numpy().T
+
+
+def load_metrics(file_name, sample_name, max_val, column_names):
+    """Load one metrics file, computing and saving max_value_info if missing."""
+    data = read_table(file_name)
     data = data.T
 
     # If info value hasn't been computed
     if data.shape[1] < len(column_names):
-        max_info_value = playback(d, d_samp_file, d_max_vals, column_names[0:-1])
+        print("Adding max_value_info to", file_name)
+        max_info_value = cached_playback(
+            file_name, sample_name, max_val, column_names[0:-1]
+        )
         data[column_names[-1]] = pd.Series(np.array(max_info_value), index=data.index)
         data.columns = column_names
         data[column_names].T.to_csv(
-            d, sep=" ", header=False, index=False, index_label=False
+            file_name, sep=" ", header=False, index=False, index_label=False
         )
-        print("Adding max_value_info to ", d)
 
     elif data.shape[1] > len(column_names):
-        data = pd.read_table(d, delimiter=" ", header=None, skipfooter=1)
-        data = data.T
-        # data[column_names].T.to_csv(d+'.mod', sep=" ", header = False, index = False, index_label = False)
-        # print "Writing", d+'.mod'
+        data = data.iloc[:, : len(column_names)]
+        # data[column_names].T.to_csv(file_name+'.mod', sep=" ", header = False, index = False, index_label = False)
+        # print "Writing", file_name+'.mod'
         data.columns = column_names
     else:
         data.columns = column_names
 
-    for index, m in enumerate(file_names[1:]):
-        m_samp_file = sample_names[index + 1]
-        m_max_vals = max_vals[index + 1]
+    # float32 is plenty for averaging and plotting, and halves the memory traffic
+    dtypes = {c: np.float32 for c in column_names}
+    dtypes["time"] = np.int16
+    return data[column_names].astype(dtypes)
 
-        temp_data = pd.read_table(m, delimiter=" ", header=None)
-        temp_data = temp_data.T
 
-        # If info value hasn't been computed
-        if temp_data.shape[1] < len(column_names):
-            print("Adding max_value_info to", m)
-            max_info_value = playback(m, m_samp_file, m_max_vals, column_names[0:-1])
-            temp_data[column_names[-1]] = pd.Series(
-                np.array(max_info_value), index=temp_data.index
-            )
-            temp_data.columns = column_names
-            temp_data[column_names].T.to_csv(
-                m, sep=" ", header=False, index=False, index_label=False
+def make_df(file_names, sample_names, max_vals, column_names):
+    # every file is independent, so load (and play back) them in parallel
+    with ProcessPoolExecutor() as ex:
+        frames = list(
+            ex.map(
+                load_metrics, file_names, sample_names, max_vals, repeat(column_names)
             )
-
-        elif temp_data.shape[1] > len(column_names):
-            temp_data = pd.read_table(m, delimiter=" ", header=None, skipfooter=1)
-            temp_data = temp_data.T
-            temp_data.columns = column_names
-            # temp_data[column_names].T.to_csv(m+'.mod', sep = " ", header = False, index = False, index_label = False)
-            # print "Writing", m+'.mod'
-        else:
-            temp_data.columns = column_names
-
-        data = data.append(temp_data)
-
-    return data
+        )
+    return pd.concat(frames, ignore_index=True, copy=False)
+
+
+def load_samples(file_name, column_names, max_loc, thresh=1.5):
+    """Load one sample file and the proportion of samples within thresh of max_loc."""
+    sdata = pd.DataFrame(read_samples(file_name), columns=column_names)
+    dx = sdata["x"].to_numpy() - max_loc[0]
+    dy = sdata["y"].to_numpy() - max_loc[1]
+    d2 = dx * dx + dy * dy
+    prop = float((d2 < thresh * thresh).sum()) / d2.size
+    # the histograms need the actual distances
+    sdata = sdata.assign(Distance=np.sqrt(d2))
+    return sdata, prop
 
 
 def make_samples_df(file_names, column_names, max_loc, thresh=1.5):
-    prop = []
-    d = file_names[0]
-    sdata = pd.read_table(d, delimiter=" ", header=None)
-    sdata = sdata.T
-    sdata.columns = column_names
-    sdata.loc[:, "Distance"] = sdata.apply(
-        lambda x: np.sqrt(
-            (x["x"] - max_loc[0][0]) ** 2 + (x["y"] - max_loc[0][1]) ** 2
-        ),
-        axis=1,
-    )
-    prop.append(float(len(sdata[sdata.Distance < thresh])) / len(sdata))
     print(len(file_names), len(max_loc))
-    for i, m in enumerate(file_names[1:]):
-        temp_data = pd.read_table(m, delimiter=" ", header=None)
-        temp_data = temp_data.T
-        temp_data.columns = column_names
-        temp_data.loc[:, "Distance"] = temp_data.apply(
-            lambda x: np.sqrt(
-                (x["x"] - max_loc[i + 1][0]) ** 2 + (x["y"] - max_loc[i + 1][1]) ** 2
-            ),
-            axis=1,
+    with ThreadPoolExecutor() as ex:
+        results = list(
+            ex.map(
+                load_samples,
+                file_names,
+                repeat(column_names),
+                max_loc,
+                repeat(thresh),
+            )
         )
-        prop.append(float(len(temp_data[temp_data.Distance < thresh])) / len(temp_data))
-        sdata = sdata.append(temp_data)
+    frames = [r[0] for r in results]
+    prop = [r[1] for r in results]
 
+    sdata = pd.concat(frames, ignore_index=True, copy=False)
     return sdata, prop
 
 
 def print_stats(meandf, mesdf, eidf, columns, end_time=174.0, fname="stats.txt"):
-    mean_end = meandf[meandf.time == end_time]
-    mes_end = mesdf[mesdf.time == end_time]
+    # mean and std of every column at end_time, one aggregation per planner
+    mean_end = meandf.loc[meandf.time == end_time, columns].agg(["mean", "std"])
+    mes_end = mesdf.loc[mesdf.time == end_time, columns].agg(["mean", "std"])
     if eidf is not None:
-        ei_end = eidf[eidf.time == end_time]
-
-    f = open(fname, "a")
+        ei_end = eidf.loc[eidf.time == end_time, columns].agg(["mean", "std"])
 
-    for e in columns:
-        f.write("-------------\n")
-        f.write(str(e) + "\n")
-        f.write(
-            "MEAN:    " + str(mean_end[e].mean()) + ", " + str(mean_end[e].std()) + "\n"
-        )
-        f.write(
-            "MES :    " + str(mes_end[e].mean()) + ", " + str(mes_end[e].std()) + "\n"
-        )
-        print("-------------")
-        print(str(e))
-        print("MEAN:    " + str(mean_end[e].mean()) + ", " + str(mean_end[e].std()))
-        print("MES :    " + str(mes_end[e].mean()) + ", " + str(mes_end[e].std()))
-        if eidf is not None:
-            f.write("EI  :    " + str(ei_end[e].mean()) + ", " + str(ei_end[e].std()))
-            print(
-                "EI  :    " + str(ei_end[e].mean()) + ", " + str(ei_end[e].std() + "\n")
-            )
-    f.close()
+    with open(fname, "a", buffering=1 << 16) as f:
+        for e in columns:
+            text = f"-------------\n{e}\n"
+            text += f"MEAN:    {mean_end[e]['mean']}, {mean_end[e]['std']}\n"
+            text += f"MES :    {mes_end[e]['mean']}, {mes_end[e]['std']}\n"
+            if eidf is not None:
+                text += f"EI  :    {ei_end[e]['mean']}, {ei_end[e]['std']}\n"
+            f.write(text)
+            print(text, end="")
 
 
 def make_histograms(mean_sdata, mes_sdata, ei_sdata, figname=""):
@@ -147,43 +154,17 @@ def make_histograms(mean_sdata, mes_sdata, ei_sdata, figname=""):
     else:
         fig, axes = plt.subplots(1, 2, sharey=True)
 
-    axes[0].hist(
-        mean_sdata["Distance"].values,
-        bins=np.linspace(
-            min(mean_sdata["Distance"].values),
-            max(mean_sdata["Distance"].values),
-            np.floor(
-                max(mean_sdata["Distance"].values) - min(mean_sdata["Distance"].values)
-            ),
-        ),
-        color="g",
-    )
+    # all histograms share the bins of the UCB samples
+    md = mean_sdata["Distance"].to_numpy()
+    lo, hi = md.min(), md.max()
+    bins = np.linspace(lo, hi, max(2, int(hi - lo)))
+
+    axes[0].hist(md, bins=bins, color="g")
     axes[0].set_title("UCB")
-    axes[1].hist(
-        mes_sdata["Distance"].values,
-        bins=np.linspace(
-            min(mean_sdata["Distance"].values),
-            max(mean_sdata["Distance"].values),
-            np.floor(
-                max(mean_sdata["Distance"].values) - min(mean_sdata["Distance"].values)
-            ),
-        ),
-        color="r",
-    )
+    axes[1].hist(mes_sdata["Distance"].to_numpy(), bins=bins, color="r")
     axes[1].set_title("PLUMES")
     if ei_sdata is not None:
-        axes[2].hist(
-            ei_sdata["Distance"].values,
-            bins=np.linspace(
-                min(mean_sdata["Distance"].values),
-                max(mean_sdata["Distance"].values),
-                np.floor(
-                    max(mean_sdata["Distance"].values)
-                    - min(mean_sdata["Distance"].values)
-                ),
-            ),
-            color="b",
-        )
+        axes[2].hist(ei_sdata["Distance"].to_numpy(), bins=bins, color="b")
         axes[2].set_title("EI")
     axes[1].set_xlabel("Distance ($m$) From Maxima")
     axes[0].set_ylabel("Count")
@@ -216,6 +197,15 @@ def make_histograms(mean_sdata, mes_sdata, ei_sdata, figname=""):
         plt.savefig(figname + "_prop_samples")
 
 
+def time_matrix(data, param, num_steps, num_runs):
+    """Pivot one metric into a (num_steps, num_runs) array with a column per run.
+    Runs are numbered in the order they appear in the concatenated dataframe.
+    """
+    run = data.groupby("time").cumcount()
+    table = data.assign(run=run).pivot(index="time", columns="run", values=param)
+    return table.loc[: num_steps - 1].to_numpy()[:, :num_runs]
+
+
 def make_plots(
     mean_data,
     mes_data,
@@ -229,76 +219,29 @@ def make_plots(
     fname="fig",
 ):
     # based upon the definition of rate of convergence
-    ucb = [0 for m in range(149)]
-    mes = [0 for m in range(149)]
-    ei = [0 for m in range(149)]
-
-    ucb_v = []
-    mes_v = []
-    ei_v = []
-
-    for i in range(d - 1):
-        sm = []
-        sme = []
-        se = []
-        for j in range(149):
-            sm.append((mean_data[mean_data.time == j][param].values[i]))
-            sme.append((mes_data[mes_data.time == j][param].values[i]))
-            if ei_data is not None:
-                se.append((ei_data[ei_data.time == j][param].values[i]))
-        ucb = [m + n for m, n in zip(ucb, sm)]
-        mes = [m + n for m, n in zip(mes, sme)]
-        if ei_data is not None:
-            ei = [m + n for m, n in zip(ei, se)]
-
-        ucb_v.append(sm)
-        mes_v.append(sme)
-        ei_v.append(se)
-
-    vucb = []
-    vmes = []
-    vei = []
-    for i in range(149):
-        t1 = []
-        t2 = []
-        t3 = []
-        if ei_data is not None:
-            for m, n, o in zip(ucb_v, mes_v, ei_v):
-                t1.append(m[i])
-                t2.append(n[i])
-                t3.append(o[i])
-            vucb.append(np.std(t1))
-            vmes.append(np.std(t2))
-            vei.append(np.std(t3))
-        else:
-            for m, n in zip(ucb_v, mes_v):
-                t1.append(m[i])
-                t2.append(n[i])
-            vucb.append(np.std(t1))
-            vmes.append(np.std(t2))
+    ucb_v = time_matrix(mean_data, param, 149, d - 1)
+    mes_v = time_matrix(mes_data, param, 149, d - 1)
+    ucb = ucb_v.sum(axis=1)
+    mes = mes_v.sum(axis=1)
+    vucb = ucb_v.std(axis=1)
+    vmes = mes_v.std(axis=1)
+    if ei_data is not None:
+        ei_v = time_matrix(ei_data, param, 149, d - 1)
+        ei = ei_v.sum(axis=1)
+        vei = ei_v.std(axis=1)
 
     fig = plt.figure()
-    plt.plot([l / d for l in ucb], "g", label="UCB")
-    plt.plot([l / d for l in mes], "r", label="PLUMES")
+    plt.plot(ucb / d, "g", label="UCB")
+    plt.plot(mes / d, "r", label="PLUMES")
     if ei_data is not None:
-        plt.plot([l / d for l in ei], "b", label="EI")
+        plt.plot(ei / d, "b", label="EI")
 
     if plot_confidence:
-        x = [i for i in range(149)]
-        y1 = [l / d + m for l, m in zip(ucb, vucb)]
-        y2 = [l / d - m for l, m in zip(ucb, vucb)]
-
-        y3 = [l / d + m for l, m in zip(mes, vmes)]
-        y4 = [l / d - m for l, m in zip(mes, vmes)]
-
+        x = np.arange(149)
+        plt.fill_between(x, ucb / d + vucb, ucb / d - vucb, color="g", alpha=0.2)
+        plt.fill_between(x, mes / d + vmes, mes / d - vmes, color="r", alpha=0.2)
         if ei_data is not None:
-            y5 = [l / d + m for l, m in zip(ei, vei)]
-            y6 = [l / d - m for l, m in zip(ei, vei)]
-
-        plt.fill_between(x, y1, y2, color="g", alpha=0.2)
-        plt.fill_between(x, y3, y4, color="r", alpha=0.2)
-        if ei_data is not None:
-            plt.fill_between(x, y5, y6, color="b", alpha=0.2)
+            plt.fill_between(x, ei / d + vei, ei / d - vei, color="b", alpha=0.2)
 
     plt.legend(fontsize=30)
     plt.xlabel("Planning Iteration")
@@ -317,20 +260,16 @@ def playback(playback_locs, playback_samples, max_val, column_names):
     """
 
     d = playback_locs
-    data = pd.read_table(d, delimiter=" ", header=None)
+    data = read_table(d)
     data = data.T
     if data.shape[1] > len(column_names):
-        data = pd.read_table(d, delimiter=" ", header=None, skipfooter=2)
-        data = data.T
+        data = data.iloc[:, : len(column_names)]
     data.columns = column_names
     robot_loc = np.vstack((data["robot_loc_x"], data["robot_loc_y"])).T
 
-    d = playback_samples
-    data = pd.read_table(d, delimiter=" ", header=None)
-    data = data.T
-    data.columns = ["x1", "x2", "z"]
-    sample_loc = np.vstack((data["x1"], data["x2"])).T
-    sample_val = data["z"].T
+    samples = np.asarray(read_samples(playback_samples), dtype=np.float64)
+    sample_loc = samples[:, 0:2]
+    sample_val = samples[:, 2]
 
     # Initialize the robot's GP model with the initial kernel parameters
     extent = (0.0, 10.0, 0.0, 10.0)
@@ -340,63 +279,91 @@ def playback(playback_locs, playback_samples, max_val, column_names):
     GP = gplib.OnlineGPModel(
         ranges=extent, lengthscale=init_lengthscale, variance=init_variance, noise=noise
     )
+    param = np.asarray(max_val, dtype=np.float64).reshape(1, 1)
 
-    t_sample_locs = {}
-    t_sample_vals = {}
     value_robot = []
 
-    S = 0
-    E = 0
-    for t, end_loc in enumerate(robot_loc[1:, :]):
-        # Get next stop point in stream
-        while not np.isclose(sample_loc[E, 0], end_loc[0]) or not np.isclose(
-            sample_loc[E, 1], end_loc[1]
-        ):
-            E += 1
-        E += 1
-
-        t_sample_locs[t] = sample_loc[S:E, :]
-        t_sample_vals[t] = np.array((sample_val[S:E])).astype("float")
-        S = E
-        E += 1
-
-        # print "--------------", t, "-----------------"
-        # print t_sample_locs[t]
-        # print t_sample_vals[t]
-
+    # Find the sample that closes each planning step; entry (i, t) is True where
+    # sample i lies on waypoint t + 1
+    stops = np.isclose(sample_loc[:, 0, None], robot_loc[None, 1:, 0]) & np.isclose(
+        sample_loc[:, 1, None], robot_loc[None, 1:, 1]
+    )
+    # The samples of step t are sample_loc[offsets[t]:offsets[t + 1]]
+    offsets = np.zeros(stops.shape[1] + 1, dtype=int)
+    for t in range(stops.shape[1]):
+        # The next stop is never the first sample of a segment
+        first = offsets[t] + (t > 0)
+        stop = np.argmax(stops[first:, t])
+        if not stops[first + stop, t]:
+            raise ValueError(f"No sample at waypoint {t + 1} of {playback_locs}")
+        offsets[t + 1] = first + stop + 1
+
+    for t in range(stops.shape[1]):
+        lo, hi = offsets[t], offsets[t + 1]
         value_robot.append(
             aqlib.mves(
                 time=t,
-                xvals=t_sample_locs[t],
+                xvals=sample_loc[lo:hi],
                 robot_model=GP,
-                param=(np.array(max_val)).reshape(1, 1),
+                param=param,
             )
         )
         GP.add_data(
-            t_sample_locs[t],
-            np.reshape(t_sample_vals[t], (t_sample_locs[t].shape[0], 1)),
+            sample_loc[lo:hi],
+            sample_val[lo:hi].reshape(-1, 1),
         )
 
-    t = 149
-    t_sample_locs[t] = sample_loc[S:, :]
-    t_sample_vals[t] = np.array((sample_val[S:])).astype("float")
-    # print "--------------", t, "-----------------"
-    # print t_sample_locs[t]
-    # print t_sample_vals[t]
-
+    # The remaining samples were collected after the final waypoint
+    lo = offsets[-1]
     value_robot.append(
         aqlib.mves(
-            time=t,
-            xvals=t_sample_locs[t],
+            time=149,
+            xvals=sample_loc[lo:],
             robot_model=GP,
-            param=(np.array(max_val)).reshape(1, 1),
+            param=param,
         )
     )
-    # GP.add_data(t_sample_locs[t], np.reshape(t_sample_vals[t], (t_sample_locs[t].shape[0], 1)))
 
     return np.cumsum(value_robot)
 
 
+# e.g. "INFO:root:World max value 11.2 at location [[ 3.4  5.6]]"
+MAX_VALUE_PATTERN = re.compile(rb"max value\s+(\S+).*?\[+\s*([^\s\]]+)\s+([^\s\]]+)")
+
+
+def cached_playback(playback_locs, playback_samples, max_val, column_names):
+    """Run playback, reusing the result saved by an earlier run on identical inputs.
+    The key covers the samples file and max_val only: load_metrics rewrites the
+    metrics file after playback, while the waypoints in it never change.
+    """
+    h = hashlib.blake2b(digest_size=8)
+    with open(playback_samples, "rb") as f:
+        h.update(f.read())
+    h.update(repr(max_val).encode())
+    cache = os.path.join(
+        os.path.dirname(playback_samples), "max_value_info." + h.hexdigest() + ".npy"
+    )
+    if os.path.exists(cache):
+        return np.load(cache)
+
+    max_info_value = playback(playback_locs, playback_samples, max_val, column_names)
+    np.save(cache, max_info_value)
+    return max_info_value
+
+
+def read_max_value(log_file):
+    """Return the last logged global maximum value and its (x, y) location."""
+    with open(log_file, "rb") as f, mmap.mmap(
+        f.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mm:
+        m = None
+        for m in MAX_VALUE_PATTERN.finditer(mm):
+            pass
+    if m is None:
+        raise ValueError("No max value found in " + log_file)
+    return float(m.group(1)), (float(m.group(2)), float(m.group(3)))
+
+
 ######### MAIN LOOP ###########
 if __name__ == "__main__":
     seed_numbers = list(range(5000, 10000, 100))
@@ -413,84 +380,61 @@ if __name__ == "__main__":
     path = "/media/genevieve/WINDOWS_COM/IROS_2019/experiments/"
     # path= '/home/vpreston/Documents/IPP/informative-path-planning/experiments/'
 
-    # get the data files
-    f_mean = []
-    f_mes = []
-
-    mean_samples = []
-    mes_samples = []
-
-    max_val = []
-    max_loc = []
-
+    # get the data files, one entry per (seed, planner) run
+    runs = {}
     for root, dirs, files in os.walk(path):
+        if fileparams not in root or "old_fully_reachable" in root:
+            continue
+        seed = next((s for s in seeds if s in root), None)
+        if seed is None:
+            continue
+        if "mean" in root:
+            algo = "mean"
+        elif "mes" in root:
+            algo = "mes"
+        # elif 'exp_improve' in root:
+        #     algo = 'exp_improve'
+        else:
+            continue
+
+        run = runs.setdefault((seed, algo), {})
         for name in files:
-            if (
-                "metrics.csv" in name
-                and fileparams in root
-                and "mean" in root
-                and "old_fully_reachable" not in root
-            ):
-                for s in seeds:
-                    if str(s) in root:
-                        f_mean.append(root + "/" + name)
-            # elif 'metric' in name and 'pathsetdubins-costFalse-nonmyopicFalse' in root and 'exp_improve' in dirs:
-            #     f_ei.append(root + "/" + name)
-            elif (
-                "metrics.csv" in name
-                and fileparams in root
-                and "mes" in root
-                and "old_fully_reachable" not in root
-            ):
-                for s in seeds:
-                    if str(s) in root:
-                        f_mes.append(root + "/" + name)
+            if name == "metrics.csv":
+                run["metrics"] = root + "/" + name
             ######## Looking at Samples ######
-            elif (
-                "robot_model" in name
-                and "mean" in root
-                and fileparams in root
-                and "old_fully_reachable" not in root
-            ):
-                for s in seeds:
-                    if str(s) in root:
-                        mean_samples.append(root + "/" + name)
-            # elif 'robot_model' in name and 'exp_improve' in root:
-            #     ei_samples.append(root+"/"+name)
-            elif (
-                "robot_model" in name
-                and "mes" in root
-                and fileparams in root
-                and "old_fully_reachable" not in root
+            # prefer the binary robot_model.npy written by newer runs
+            elif name == "robot_model.npy" or (
+                name == "robot_model.csv" and "robot_model" not in run
             ):
-                for s in seeds:
-                    if str(s) in root:
-                        mes_samples.append(root + "/" + name)
+                run["robot_model"] = root + "/" + name
             ######## Looking at Mean values ######
             # get the robot log files
-            elif (
-                "log" in name
-                and "mean" in root
-                and fileparams in root
-                and "old_fully_reachable" not in root
-            ):
-                for s in seeds:
-                    ls = []
-                    if str(s) in root:
-                        temp = open(root + "/" + name, "r")
-                        for l in temp.readlines():
-                            if "max value" in l:
-                                ls.append(l)
-                        max_val.append(float(ls[-1].split(" ")[3]))
-                        # For Genevieve
-                        max_loc.append(
-                            (
-                                float(ls[-1].split(" ")[7].split("[")[0]),
-                                float(ls[-1].split(" ")[9].split("]")[0]),
-                            )
-                        )
-                        # For Victoria
-                        # max_loc.append((float(ls[0].split(" ")[6].split("[")[1]), float(ls[0].split(" ")[7].split("]")[0])))
+            elif name.endswith(".log") and algo == "mean":
+                run["log"] = root + "/" + name
+
+    # keep only the seeds for which every file was found, so the lists line up
+    complete = [
+        s
+        for s in seeds
+        if {"metrics", "robot_model", "log"} <= set(runs.get((s, "mean"), {}))
+        and {"metrics", "robot_model"} <= set(runs.get((s, "mes"), {}))
+    ]
+    for s in seeds:
+        if s not in complete and ((s, "mean") in runs or (s, "mes") in runs):
+            print("Skipping incomplete run", s)
+
+    f_mean = [runs[(s, "mean")]["metrics"] for s in complete]
+    f_mes = [runs[(s, "mes")]["metrics"] for s in complete]
+
+    mean_samples = [runs[(s, "mean")]["robot_model"] for s in complete]
+    mes_samples = [runs[(s, "mes")]["robot_model"] for s in complete]
+
+    with ThreadPoolExecutor() as ex:
+        max_info = list(
+            ex.map(read_max_value, [runs[(s, "mean")]["log"] for s in complete])
+        )
+    max_val = [m[0] for m in max_info]
+    max_loc = [m[1] for m in max_info]
 
     # variables for making dataframes
     column_names = [
@@ -541,7 +485,7 @@ if __name__ == "__main__":
         None,
         "max_val_error",
         "Averaged Maximum Value Error, Conf",
-        len(seeds),
+        len(complete),
         True,
         True,
         fname=file_start + "_avg_valerr_conf",
@@ -552,7 +496,7 @@ if __name__ == "__main__":
         None,
         "max_loc_error",
         "Averaged Maximum Location Error, Conf",
-        len(seeds),
+        len(complete),
         True,
         True,
         fname=file_start + "_avg_valloc_conf",
@@ -563,7 +507,7 @@ if __name__ == "__main__":
         None,
         "info_regret",
         "Averaged Information Regret, Conf",
-        len(seeds),
+        len(complete),
         True,
         True,
         fname=file_start + "_avg_reg_conf",
@@ -574,7 +518,7 @@ if __name__ == "__main__":
         None,
         "MSE",
         "Averaged MSE, Conf",
-        len(seeds),
+        len(complete),
         True,
         True,
         fname=file_start + "_avg_mse_conf",
@@ -585,7 +529,7 @@ if __name__ == "__main__":
         None,
         "max_value_info",
         "Averaged Max-Value Info, Conf",
-        len(seeds),
+        len(complete),
         True,
         True,
         fname=file_start + "_avg_maxval_info_conf",
@@ -10,6 +10,7 @@ Maintainers: Genevieve Flaspohler and Victoria Preston
 import logging
 import math
 import os
+import threading
 
 import GPy as GPy
 import numpy as np
@@ -19,15 +20,76 @@ from GPy.util import diag
 from GPy.util.linalg import (dpotri, dpotrs, dtrtrs, jitchol, pdinv,
                              symmetrify, tdot)
 from IPython.display import display
+from scipy.linalg import cho_solve
+from scipy.linalg.blas import dgemm, dsyrk
+from scipy.linalg.lapack import spotrf, strtrs
 
 logger = logging.getLogger('robot')
 import pdb
 
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+
+if njit is not None:
+    @njit(parallel = True, fastmath = True, cache = True)
+    def _rbf_gram(X1, X2, inv2l2, variance):
+        ''' RBF kernel matrix variance * exp(-|x1 - x2|^2 / (2 l^2)), computed in compiled loops '''
+        n, m, d = X1.shape[0], X2.shape[0], X1.shape[1]
+        K = np.empty((n, m))
+        for i in prange(n):
+            for j in range(m):
+                r2 = 0.
+                for k in range(d):
+                    b = X1[i, k] - X2[j, k]
+                    r2 += b * b
+                K[i, j] = variance * np.exp(-r2 * inv2l2)
+        return K
+else:
+    _rbf_gram = None
+
+
+def _grow_buffer(buf, block, size):
+    ''' Return a square buffer of at least size x size whose leading block is block. The buffer
+    is reused while block is a view into it, and its capacity doubles when it runs out '''
+    if buf is not None and buf.shape[0] >= size and (block is buf or block.base is buf):
+        return buf
+    n = block.shape[0]
+    capacity = max(size, 2 * n)
+    new = np.zeros((capacity, capacity), dtype = block.dtype)
+    new[:n, :n] = block
+    return new
+
+
+def _grow_rows(buf, n, size):
+    ''' Return a buffer with room for at least size rows whose first n rows are those of buf.
+    The buffer is reused while it has room, and its capacity doubles when it runs out '''
+    if buf.shape[0] >= size:
+        return buf
+    new = np.empty((max(size, 2 * buf.shape[0]),) + buf.shape[1:], dtype = buf.dtype)
+    new[:n] = buf[:n]
+    return new
+
+
+def _rbf_K(X1, X2, lengthscale, variance):
+    ''' RBF kernel matrix from BLAS squared distances |x1|^2 + |x2|^2 - 2 x1.x2, used when numba is unavailable '''
+    D = dgemm(-2., X1, X2, trans_b = True)
+    D += np.einsum('ij,ij->i', X1, X1)[:, None]
+    D += np.einsum('ij,ij->i', X2, X2)[None, :]
+    # Clip the small negative distances left by round-off
+    np.maximum(D, 0., out = D)
+    D *= -0.5 / lengthscale**2
+    np.exp(D, out = D)
+    D *= variance
+    return D
+
 
 class GPModel(object):
     '''The GPModel class, which is a wrapper on top of GPy.'''     
     
-    def __init__(self, ranges, lengthscale, variance, noise = 0.0001, dimension = 2, kernel = 'rbf'):
+    def __init__(self, ranges, lengthscale, variance, noise = 0.0001, dimension = 2, kernel = 'rbf', num_inducing = None):
         '''Initialize a GP regression model with given kernel parameters. 
         Inputs:
             ranges (list of floats) the bounds of the world
@@ -36,18 +98,22 @@ class GPModel(object):
             noise (float) the sensor noise parameter of kernel
             dimension (float) the dimension of the environment; only 2D supported
             kernel (string) the type of kernel; only 'rbf' supported now
+            num_inducing (int) if set, use a sparse GP with this many inducing points
         '''
         
         # Model parameterization (noise, lengthscale, variance)
         self.noise = noise
         self.lengthscale = lengthscale
         self.variance = variance
+        self.num_inducing = num_inducing
         
         self.ranges = ranges
         
-        # The Gaussian dataset; start with null set
-        self.xvals = None
-        self.zvals = None
+        # The Gaussian dataset; start with null set. The data is stored in over-allocated buffers
+        # whose first _n rows are exposed as xvals and zvals
+        self._x_buf = None
+        self._z_buf = None
+        self._n = 0
         
         # The dimension of the evironment
         if dimension == 2:
@@ -59,10 +125,72 @@ class GPModel(object):
             self.kern = GPy.kern.RBF(input_dim = self.dim, lengthscale = lengthscale, variance = variance) 
         else:
             raise ValueError('Kernel type must by \'rbf\'')
+        self._cache_kernel_params()
+        # Serializes kernel evaluations, for callers that score paths from several threads. GPy's
+        # kern.K caches its results without locking, and numba's default threading layer aborts
+        # when a parallel kernel is entered from two threads at once
+        self.kern_lock = threading.RLock()
             
         # Intitally, before any data is created, 
         self.model = None
 
+    def _cache_kernel_params(self):
+        ''' Keep the RBF hyperparameters as plain floats, so the kernel fast paths do not go through
+        GPy's parameter lookup on every call. Must be called whenever self.kern is changed '''
+        self._rbf_lengthscale = float(self.kern.lengthscale[0])
+        self._rbf_variance = float(self.kern.variance[0])
+
+    def kern_K(self, X1, X2 = None):
+        ''' Kernel matrix between X1 and X2 (X1 with itself if X2 is None). RBF kernels use the
+        compiled gram matrix when numba is available and BLAS squared distances otherwise. Safe to
+        call from several threads '''
+        if X2 is None:
+            X2 = X1
+        if not isinstance(self.kern, GPy.kern.RBF):
+            with self.kern_lock:
+                return self.kern.K(X1, X2)
+        X1 = np.asarray(X1, dtype = np.float64)
+        X2 = np.asarray(X2, dtype = np.float64)
+        if _rbf_gram is None:
+            return _rbf_K(X1, X2, self._rbf_lengthscale, self._rbf_variance)
+        with self.kern_lock:
+            return _rbf_gram(X1, X2, 0.5 / self._rbf_lengthscale**2, self._rbf_variance)
+
+    def kern_Kdiag(self, X):
+        ''' Diagonal of the kernel matrix of X; constant for the RBF kernel '''
+        if not isinstance(self.kern, GPy.kern.RBF):
+            with self.kern_lock:
+                return self.kern.Kdiag(X)
+        return np.full(X.shape[0], self._rbf_variance)
+
+    @property
+    def xvals(self):
+        ''' Observation locations, NUM_PTS x 2, or None before any data is added '''
+        if self._n == 0:
+            return None
+        return self._x_buf[:self._n]
+
+    @property
+    def zvals(self):
+        ''' Sensor observations, NUM_PTS x 1, or None before any data is added '''
+        if self._n == 0:
+            return None
+        return self._z_buf[:self._n]
+
+    def _append_data(self, xvals, zvals):
+        ''' Append observations to the data buffers, reallocating them only when they are full.
+        Stored C-contiguous float64, so GPy can use them without copying '''
+        k = xvals.shape[0]
+        if self._n == 0:
+            self._x_buf = np.array(xvals, dtype = np.float64, order = 'C')
+            self._z_buf = np.array(zvals, dtype = np.float64, order = 'C')
+        else:
+            self._x_buf = _grow_rows(self._x_buf, self._n, self._n + k)
+            self._z_buf = _grow_rows(self._z_buf, self._n, self._n + k)
+            self._x_buf[self._n:self._n + k] = xvals
+            self._z_buf[self._n:self._n + k] = zvals
+        self._n += k
+
     def predict_value(self, xvals, include_noise = False):
         ''' Public method returns the mean and variance predictions at a set of input locations.
         Inputs:
@@ -82,10 +210,26 @@ class GPModel(object):
         if self.model == None:
             return np.zeros((n_points, 1)), np.ones((n_points, 1)) * self.variance
         
-        # Else, return the predicted values
-        mean, var = self.model.predict(xvals, full_cov = False, include_likelihood = include_noise)
-        return mean, var        
+        # Else, return the predicted values; GPy's kernel caches are shared, hence the lock
+        with self.kern_lock:
+            mean, var = self.model.predict(xvals, full_cov = False, include_likelihood = include_noise)
+        return mean, var
+
+    def predict_value_batch(self, xvals_list, **kwargs):
+        ''' Public method returns the mean and variance predictions for several sets of input locations,
+        e.g. every candidate path of a planning step, evaluating the cross kernel against the
+        observations once for all of them.
+        Inputs:
+            xvals_list (list of float arrays): nparrays of observation locations, each with dimension NUM_PTS x 2
+            kwargs: passed on to predict_value (full_cov is not supported)
 
+        Returns:
+            list of (mean, var) tuples, one for each entry of xvals_list
+        '''
+        sizes = [xvals.shape[0] for xvals in xvals_list]
+        mean, var = self.predict_value(np.vstack(xvals_list), **kwargs)
+        splits = np.cumsum(sizes)[:-1]
+        return list(zip(np.split(mean, splits), np.split(var, splits)))
 
     def add_data(self, xvals, zvals):
         ''' Public method that adds data to an the GP model.
@@ -94,22 +238,19 @@ class GPModel(object):
             zvals (float array): an nparray of floats representing sensor observations, with dimension NUM_PTS x 1 
         ''' 
        
-        if self.xvals is None:
-            self.xvals = xvals
-        else:
-            self.xvals = np.vstack([self.xvals, xvals])
-            
-        if self.zvals is None:
-            self.zvals = zvals
-        else:
-            self.zvals = np.vstack([self.zvals, zvals])
-
-        # If the model hasn't been created yet (can't be created until we have data), create GPy model
-        if self.model == None or True:
-            self.model = GPy.models.GPRegression(np.array(self.xvals), np.array(self.zvals), self.kern)
+        self._append_data(xvals, zvals)
+
+        # If the model hasn't been created yet (can't be created until we have data), create GPy model.
+        # A sparse model is also rebuilt until there is enough data to place all inducing points
+        if self.model is None or (self.num_inducing is not None and self.model.Z.shape[0] < self.num_inducing):
+            if self.num_inducing is not None:
+                # Low rank (variational inducing point) approximation, O(n m^2) instead of O(n^3)
+                self.model = GPy.models.SparseGPRegression(self.xvals, self.zvals, kernel = self.kern, num_inducing = self.num_inducing)
+            else:
+                self.model = GPy.models.GPRegression(self.xvals, self.zvals, self.kern)
         # Else add to the exisiting model
         else:
-            self.model.set_XY(X = np.array(self.xvals), Y = np.array(self.zvals))
+            self.model.set_XY(X = self.xvals, Y = self.zvals)
 
     def posterior_samples(self, xvals, size=10, full_cov = True):
         fsim = self.model.posterior_samples_f(xvals, size, full_cov=full_cov)
@@ -126,6 +267,7 @@ class GPModel(object):
             print("Loading kernel parameters from file")
             logger.info("Loading kernel parameters from file")
             self.kern[:] = np.load(kernel_file)
+            self._cache_kernel_params()
         else:
             raise ValueError("Failed to load kernel. Kernel parameter file not found.")
         return
@@ -149,7 +291,7 @@ class GPModel(object):
             print("Optimizing kernel parameters given data")
             logger.info("Optimizing kernel parameters given data")
             # Initilaize a GP model (used only for optmizing kernel hyperparamters)
-            self.m = GPy.models.GPRegression(np.array(xvals), np.array(zvals), self.kern)
+            self.m = GPy.models.GPRegression(xvals, zvals, self.kern)
             # self.m = GPy.models.models.SparseGPRegression(X=np.array(self.xvals), Y=np.array(self.zvals),kernel= self.kern, num_inducing=1000)
             self.m.initialize_parameter()
 
@@ -164,6 +306,7 @@ class GPModel(object):
             np.save(kernel_file, self.kern[:])
             self.lengthscale = self.kern.lengthscale
             self.variance = self.kern.variance
+            self._cache_kernel_params()
 
         else:
             raise ValueError("Failed to train kernel. No training data provided.")
@@ -174,11 +317,18 @@ class OnlineGPModel(GPModel):
         Woodbury-Morrison formula by modifying the Posteior class from the GPy Library 
     '''
 
-    def __init__(self, ranges, lengthscale, variance, noise = 0.0001, dimension = 2, kernel = 'rbf',  update_legacy = False):
+    def __init__(self, ranges, lengthscale, variance, noise = 0.0001, dimension = 2, kernel = 'rbf',  update_legacy = False, single_precision = False):
         super(OnlineGPModel, self).__init__(ranges, lengthscale, variance, noise, dimension, kernel)
         
+        # Optionally hold K and its cholesky factor in float32, halving their memory traffic;
+        # predictions are still returned as float64
+        self.dtype = np.float32 if single_precision else np.float64
+        
         self._K_chol = None
         self._K = None
+        # Over-allocated storage that _K and _woodbury_chol are leading views into
+        self._K_buf = None
+        self._L_buf = None
         #option 1:
         self._woodbury_chol = None
         self._woodbury_vector =  None
@@ -190,23 +340,46 @@ class OnlineGPModel(GPModel):
         self._prior_mean = 0.
         self.update_legacy = update_legacy
     
+    def _chol(self, A):
+        ''' Lower cholesky factor of A, in single precision if requested. Falls back to a
+        jittered double precision factorization if the float32 one is not positive definite '''
+        if A.dtype == np.float32:
+            L, info = spotrf(A, lower = 1, clean = 1)
+            if info == 0:
+                return L
+            logger.info("Single precision cholesky failed, refactoring in double precision")
+        return jitchol(np.asarray(A, dtype = np.float64))
+
+    def _solve_tri(self, L, B):
+        ''' Solve L X = B for the lower triangular L, matching its precision '''
+        if L.dtype == np.float32:
+            return strtrs(L, np.asarray(B, dtype = np.float32), lower = 1)[0]
+        return dtrtrs(L, B, lower = 1)[0]
+
+    def _noisy_chol(self, K):
+        ''' Cholesky factor of K plus the conditioning noise. The noise is added to the diagonal
+        of K in place and the diagonal restored afterwards, instead of copying all of K '''
+        diagonal = K.diagonal().copy()
+        # Adds some additional noise to ensure well-conditioned
+        np.fill_diagonal(K, diagonal + (self.noise + 1e-8))
+        try:
+            return self._chol(K)
+        finally:
+            np.fill_diagonal(K, diagonal)
+
     def init_model(self, xvals, zvals):
         # Update internal data
-        self.xvals = xvals
-        self.zvals = zvals
+        self._n = 0
+        self._append_data(xvals, zvals)
     
-        self._K = self.kern.K(self.xvals)
-
-        Ky = self._K.copy()
-
-        # Adds some additional noise to ensure well-conditioned
-        diag.add(Ky, self.noise + 1e-8)
-        Wi, LW, LWi, W_logdet = pdinv(Ky)
+        self._K = self.kern_K(self.xvals).astype(self.dtype, copy = False)
 
-        self._woodbury_inv = Wi 
-        self._woodbury_vector =  np.dot(self._woodbury_inv, self.zvals) 
+        # Only the cholesky factor is stored; the woodbury inverse is formed lazily if needed
+        self._woodbury_chol = self._L_buf = self._noisy_chol(self._K)
+        self._K_buf = self._K
+        self._woodbury_vector = cho_solve((self._woodbury_chol, True), self.zvals.astype(self._woodbury_chol.dtype))
         
-        self._woodbury_chol = None 
+        self._woodbury_inv = None
         self._mean =  None
         self._covariance = None
         self._prior_mean = 0.
@@ -216,48 +389,47 @@ class OnlineGPModel(GPModel):
         assert(self.xvals is not None)
         assert(self.zvals is not None)
         
-        Kx = self.kern.K(self.xvals, xvals)
-
-        # Update K matrix
-        self._K = np.block([
-            [self._K,    Kx],
-            [Kx.T,      self.kern.K(xvals, xvals)] 
-         ])
+        # Kernel blocks between the old and new data, each evaluated once
+        Kx = self.kern_K(self.xvals, xvals).astype(self.dtype, copy = False)
+        S = self.kern_K(xvals, xvals).astype(self.dtype, copy = False)
+        n, k = Kx.shape
+
+        # Update K matrix, writing the new rows and columns into its buffer in place
+        self._K_buf = _grow_buffer(self._K_buf, self.K, n + k)
+        self._K_buf[:n, n:n+k] = Kx
+        self._K_buf[n:n+k, :n] = Kx.T
+        self._K_buf[n:n+k, n:n+k] = S
+        self._K = self._K_buf[:n+k, :n+k]
 
         # Update internal data
-        self.xvals = np.vstack([self.xvals, xvals])
-        self.zvals = np.vstack([self.zvals, zvals])
+        self._append_data(xvals, zvals)
 
-        # Update woodbury inverse, either incrementally or from scratch
+        # Update cholesky decomposition of the woodbury matrix, either incrementally or from scratch
         if incremental == True:
-            Pinv = self.woodbury_inv
-            Q = Kx
-            R = Kx.T
-            S = self.kern.K(xvals, xvals)
-            M = S - np.dot(np.dot(R, Pinv), Q)
-            # Adds some additional noise to ensure well-conditioned
-            diag.add(M, self.noise + 1e-8)
-            M, _, _, _ = pdinv(M)
-
-            Pnew = Pinv + np.dot(np.dot(np.dot(np.dot(Pinv, Q), M), R), Pinv)
-            Qnew = -np.dot(np.dot(Pinv, Q), M)
-            Rnew = -np.dot(np.dot(M, R), Pinv)
-            Snew = M
-
-            self._woodbury_inv = np.block([
-                [Pnew, Qnew],
-                [Rnew, Snew]
-            ])
+            L = self.woodbury_chol
+            # Extend the lower triangular factor by the new block:
+            # L12 = L^{-1} Kx and L22 L22^T = S - L12^T L12
+            L12 = self._solve_tri(L, Kx)
+            # Adds some additional noise to ensure well-conditioned (S was copied into K above)
+            diag.add(S, self.noise + 1e-8)
+            if xvals.shape[0] == 1 and S[0, 0] > np.dot(L12[:, 0], L12[:, 0]):
+                # A single new observation only needs a scalar square root
+                L22 = np.sqrt(S - np.dot(L12[:, 0], L12[:, 0])).reshape(1, 1)
+            else:
+                L22 = self._chol(S - np.dot(L12.T, L12))
+
+            # The block above L22 stays zero in the buffer
+            self._L_buf = _grow_buffer(self._L_buf, L, n + k)
+            self._L_buf[n:n+k, :n] = L12.T
+            self._L_buf[n:n+k, n:n+k] = L22
+            self._woodbury_chol = self._L_buf[:n+k, :n+k]
         else:
-            Ky = self.K.copy()
-            # Adds some additional noise to ensure well-conditioned
-            diag.add(Ky, self.noise + 1e-8)
-            Wi, LW, LWi, W_logdet = pdinv(Ky)
-            self._woodbury_inv = Wi 
+            self._woodbury_chol = self._L_buf = self._noisy_chol(self._K)
         
-        self._woodbury_vector = np.dot(self.woodbury_inv, self.zvals) 
+        self._woodbury_vector = cho_solve((self._woodbury_chol, True), self.zvals.astype(self._woodbury_chol.dtype))
 
-        self._woodbury_chol = None 
+        # The woodbury inverse is only formed if a caller asks for it
+        self._woodbury_inv = None 
         self._mean =  None
         self._covariance = None
         self._prior_mean = 0.
@@ -280,49 +452,42 @@ class OnlineGPModel(GPModel):
             # Include this code to update the GP model if you want to compare to lecacy predictor 
             # If the model hasn't been created yet (can't be created until we have data), create GPy model
             if self.model == None:
-                self.model = GPy.models.GPRegression(np.array(self.xvals), np.array(self.zvals), self.kern)
+                self.model = GPy.models.GPRegression(self.xvals, self.zvals, self.kern)
             # Else add to the exisiting model
             else:
-                self.model.set_XY(X = np.array(self.xvals), Y = np.array(self.zvals))
+                self.model.set_XY(X = self.xvals, Y = self.zvals)
     
-    def predict_value(self, xvals, include_noise = True, full_cov = False):
-        # Calculate for the test point
+    def predict_value(self, xvals, include_noise = True, full_cov = False, Kx = None, return_var = True):
+        # Calculate for the test point; Kx optionally provides a precomputed kern.K(self.xvals, xvals).
+        # With return_var = False only the mean is computed and None is returned for the variance
         assert(xvals.shape[0] >= 1)            
         assert(xvals.shape[1] == self.dim)    
-	n_points, input_dim = xvals.shape
+        n_points, input_dim = xvals.shape
 
         # With no observations, predict 0 mean everywhere and prior variance
         if self.xvals is None:
+            if not return_var:
+                return np.zeros((n_points, 1)), None
             return np.zeros((n_points, 1)), np.ones((n_points, 1)) * self.variance
 
-        Kx = self.kern.K(self.xvals, xvals)
-        mu = np.dot(Kx.T, self.woodbury_vector)
+        if Kx is None:
+            Kx = self.kern_K(self.xvals, xvals)
+        mu = np.dot(Kx.T, self.woodbury_vector).astype(np.float64, copy = False)
         if len(mu.shape)==1:
             mu = mu.reshape(-1,1)
-        if full_cov:
-            Kxx = self.kern.K(xvals)
-            if self.woodbury_inv.ndim == 2:
-                var = Kxx - np.dot(Kx.T, np.dot(self.woodbury_inv, Kx))
-        else:
-            Kxx = self.kern.Kdiag(xvals)
-            var = (Kxx - np.sum(np.dot(self.woodbury_inv.T, Kx) * Kx, 0))[:,None]
+        if not return_var:
+            return mu, None
 
-        '''
-        # Alternative way to compute predictions using the cholesky decompostion of the woodvery matrix
-        Kx = self.kern.K(self.xvals, xvals)
-        mu = np.dot(Kx.T, self.woodbury_vector)
-        if len(mu.shape)==1:
-            mu = mu.reshape(-1,1)
+        # Whiten the cross covariance with the cholesky decomposition of the woodbury matrix,
+        # rather than forming the full product with the woodbury inverse
+        tmp = self._solve_tri(self.woodbury_chol, Kx).astype(np.float64, copy = False)
         if full_cov:
-            Kxx = self.kern.K(xvals)
-            tmp = dtrtrs(self.woodbury_chol, Kx)[0]
+            Kxx = self.kern_K(xvals)
             var = Kxx - tdot(tmp.T)
         else:
-            Kxx = self.kern.Kdiag(xvals)
-            tmp = dtrtrs(self.woodbury_chol, Kx)[0]
-            var = (Kxx - np.square(tmp).sum(0))[:,None]
-        '''
- 
+            Kxx = self.kern_Kdiag(xvals)
+            var = (Kxx - np.einsum('ij,ij->j', tmp, tmp))[:,None]
+
         # If model noise should be inlcuded in the prediction
         if include_noise: 
             var += self.noise
@@ -368,13 +533,19 @@ class OnlineGPModel(GPModel):
         """
         m, v = self.predict_value(xvals, include_noise = True, full_cov = full_cov)
 
+        # The covariance is shared by every output dimension, so factor it only once
+        if full_cov:
+            L = jitchol(v)
+
         def sim_one_dim(m, v):
+            eps = np.random.standard_normal((m.shape[0], size))
             if not full_cov:
-                return np.random.multivariate_normal(m.flatten(), np.diag(v.flatten()), size).T
+                # Independent marginals, no factorization needed
+                return m.reshape(-1, 1) + np.sqrt(v).reshape(-1, 1) * eps
             else:
-                return np.random.multivariate_normal(m.flatten(), v, size).T
+                return m.reshape(-1, 1) + np.dot(L, eps)
 
-        num_data, input_dim = self.xvals.shape
+        num_data = xvals.shape[0]
         output_dim = self.zvals.shape[1]
 
         if output_dim == 1:
@@ -391,7 +562,7 @@ class OnlineGPModel(GPModel):
     @property
     def K(self):
         if self._K is None:
-            self._K = self.kern.K(self.xvals, self.xvals)
+            self._K = self.kern_K(self.xvals, self.xvals)
         return self._K
     
     @property
@@ -418,7 +589,11 @@ class OnlineGPModel(GPModel):
         """
         if self._covariance is None:
             #self._covariance = (np.atleast_3d(self._K) - np.tensordot(np.dot(np.atleast_3d(self.woodbury_inv).T, self._K), self._K, [1,0]).T).squeeze()
-            self._covariance = self._K - self._K.dot(self.woodbury_inv).dot(self._K)
+            # K W^{-1} K = (L^{-1} K)^T (L^{-1} K): one triangular solve and one symmetric rank-n update
+            tmp = self._solve_tri(self.woodbury_chol, self._K).astype(np.float64, copy = False)
+            KWK = dsyrk(1.0, tmp, trans = 1, lower = 0)
+            symmetrify(KWK, upper = True)
+            self._covariance = self._K - KWK
         return self._covariance
 
     @property
@@ -426,17 +601,15 @@ class OnlineGPModel(GPModel):
         """
         return $L_{W}$ where L is the lower triangular Cholesky decomposition of the Woodbury matrix
         $$
-        L_{W}L_{W}^{\top} = W^{-1}
+        L_{W}L_{W}^{\top} = W
         W^{-1} := \texttt{Woodbury inv}
         $$
         """
         if self._woodbury_chol is None:
             #compute woodbury chol from
             if self._woodbury_inv is not None:
-                winv = np.atleast_3d(self._woodbury_inv)
-                self._woodbury_chol = np.zeros(winv.shape)
-                for p in range(winv.shape[-1]):
-                    self._woodbury_chol[:,:,p] = pdinv(winv[:,:,p])[2]
+                # The woodbury matrix is K plus the conditioning noise
+                self._woodbury_chol = self._noisy_chol(self.K)
             elif self._covariance is not None:
                 raise NotImplementedError("TODO: check code here")
                 B = self._K - self._covariance
@@ -458,14 +631,19 @@ class OnlineGPModel(GPModel):
         """
         if self._woodbury_inv is None:
             if self._woodbury_chol is not None:
-                self._woodbury_inv, _ = dpotri(self._woodbury_chol, lower=1)
+                self._woodbury_inv, _ = dpotri(np.asfortranarray(self._woodbury_chol), lower=1)
                 symmetrify(self._woodbury_inv)
             elif self._covariance is not None:
-                B = np.atleast_3d(self._K) - np.atleast_3d(self._covariance)
-                self._woodbury_inv = np.empty_like(B)
-                for i in range(B.shape[-1]):
-                    tmp, _ = dpotrs(self.K_chol, B[:,:,i])
-                    self._woodbury_inv[:,:,i], _ = dpotrs(self.K_chol, tmp.T)
+                # W^{-1} = K^{-1} B K^{-1}; a multi-output B is solved for all outputs at once
+                # by stacking its slices as columns of one right hand side
+                if self._covariance.ndim == 2:
+                    B = self._K - self._covariance
+                else:
+                    B = np.atleast_3d(self._K) - self._covariance
+                n = B.shape[0]
+                tmp = cho_solve((self.K_chol, True), B.reshape(n, -1))
+                tmp = np.swapaxes(tmp.reshape(B.shape), 0, 1).reshape(n, -1)
+                self._woodbury_inv = cho_solve((self.K_chol, True), tmp).reshape(B.shape)
         return self._woodbury_inv
 
     @property
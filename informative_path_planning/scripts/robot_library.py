@@ -8,6 +8,8 @@ import math
 import os
 import pdb
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from itertools import chain
 
 import dubins
@@ -18,7 +20,9 @@ import scipy as sp
 from IPython.display import display
 from matplotlib import cm
 from matplotlib import pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.colors import LogNorm
+from matplotlib.figure import Figure
 from scipy.stats import multivariate_normal
 from sklearn import mixture
 
@@ -33,9 +37,106 @@ import obstacles as obslib
 import paths_library as pathlib
 
 
+def _make_grid(extent, n1, n2):
+    """Build an n1 x n2 grid over a 2D rectangular domain in one contiguous allocation.
+    Input:
+        extent (tuple of floats): the max/min of the domain i.e. (-10, 10, -50, 50)
+        n1, n2 (int): the number of grid points along the first and second dimension
+    Output:
+        x1, x2 (float arrays): the grid coordinates, laid out like np.meshgrid with indexing="xy"
+        data (float array): a C-contiguous nparray of the grid points, with dimension n1 * n2 x 2
+    """
+    grid = np.empty((n2, n1, 2))
+    grid[:, :, 0] = np.linspace(extent[0], extent[1], n1)[None, :]
+    grid[:, :, 1] = np.linspace(extent[2], extent[3], n2)[:, None]
+    return grid[:, :, 0], grid[:, :, 1], grid.reshape(-1, 2)
+
+
+class _CachedPathGenerator(object):
+    """Wraps a path generator and memoizes get_path_set on the queried pose. The path sets only depend
+    on the pose and the obstacle world, which is static, so the tree search re-expanding a pose reuses
+    them. At most max_entries poses are kept, evicting the oldest first; all other attributes are
+    those of the wrapped generator."""
+
+    def __init__(self, path_generator, max_entries=128):
+        self.path_generator = path_generator
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+
+    def get_path_set(self, current_pose):
+        key = tuple(float(p) for p in current_pose)
+        if key not in self._cache:
+            if len(self._cache) >= self.max_entries:
+                self._cache.popitem(last=False)
+            self._cache[key] = self.path_generator.get_path_set(current_pose)
+        return self._cache[key]
+
+    def __getattr__(self, name):
+        # Only reached for attributes the wrapper does not define itself
+        if name.startswith("__") or name == "path_generator":
+            raise AttributeError(name)
+        return getattr(self.path_generator, name)
+
+
 class Robot(object):
     """The Robot class, which includes the vehicles current model of the world and IPP algorithms."""
 
+    # Every attribute the robot sets, so lookups in the planning loop skip the instance dict
+    __slots__ = (
+        "ranges",
+        "create_animation",
+        "eval",
+        "loc",
+        "sample_world",
+        "f_rew",
+        "fs",
+        "discretization",
+        "tree_type",
+        "maxes",
+        "current_max",
+        "current_max_loc",
+        "max_locs",
+        "max_val",
+        "target",
+        "noise",
+        "learn_params",
+        "use_cost",
+        "aquisition_function",
+        "aquisition_moments",
+        "_build_param",
+        "aquisition_points",
+        "sample_num",
+        "sample_radius",
+        "GP",
+        "path_generator",
+        "path_option",
+        "nonmyopic",
+        "comp_budget",
+        "roll_length",
+        "step_size",
+        "sample_step",
+        "turning_radius",
+        "MIN_COLOR",
+        "MAX_COLOR",
+        "goals",
+        "goal_only",
+        "_grid_30",
+        "_x1_100",
+        "_x2_100",
+        "_grid_100",
+        "_x1_viz",
+        "_x2_viz",
+        "_grid_viz",
+        "_viz_fig",
+        "_viz_ax",
+        "_viz_im",
+        "obstacle_world",
+        "_obstacle_xy",
+        "_path_workers",
+        "trajectory",
+        "dist",
+    )
+
     def __init__(
         self,
         sample_world,
@@ -66,6 +167,8 @@ class Robot(object):
         goal_only=False,
         obstacle_world=obslib.FreeWorld(),
         tree_type="dpw",
+        viz_resolution=64,
+        parallel_paths=False,
     ):
         """Initialize the robot class with a GP model, initial location, path sets, and prior dataset
         Inputs:
@@ -86,13 +189,16 @@ class Robot(object):
             evaluation (Evaluation object): an evaluation object for performance metric compuation
             f_rew (string): the reward function. One of {hotspot_info, mean, info_gain, exp_info, mes}
                     create_animation (boolean): save the generate world model and trajectory to file at each timestep
+            viz_resolution (int): the number of grid points along each dimension of the trajectory contour plots
+            parallel_paths (boolean): score the frontier paths concurrently in a thread pool when the reward function
+                    has no batched form; GP predictions spend their time in BLAS, which releases the GIL
         """
 
         # Parameterization for the robot
         self.ranges = extent
         self.create_animation = create_animation
         self.eval = evaluation
-        self.loc = start_loc
+        self.loc = np.asarray(start_loc, dtype=np.float64)
         self.sample_world = sample_world
         self.f_rew = f_rew
         self.fs = frontier_size
@@ -101,7 +207,7 @@ class Robot(object):
 
         self.maxes = []
         self.current_max = -1000
-        self.current_max_loc = [0, 0]
+        self.current_max_loc = np.zeros(2)
         self.max_locs = None
         self.max_val = None
         self.target = None
@@ -110,18 +216,33 @@ class Robot(object):
         self.learn_params = learn_params
         self.use_cost = use_cost
 
+        # Rewards that only depend on the posterior mean and variance at each point also have a
+        # form that takes those predictions directly, so many points can be scored at once.
+        # Rewards that are parameterized by the robot's state also bind how to build that parameter
+        self.aquisition_moments = None
+        self._build_param = None
+        # Others can still score many points as separate one-point paths in one call
+        self.aquisition_points = None
         if f_rew == "hotspot_info":
             self.aquisition_function = aqlib.hotspot_info_UCB
+            self.aquisition_points = aqlib.hotspot_info_UCB_points
         elif f_rew == "mean":
             self.aquisition_function = aqlib.mean_UCB
+            self.aquisition_moments = aqlib.mean_UCB_moments
         elif f_rew == "info_gain":
             self.aquisition_function = aqlib.info_gain
+            self.aquisition_points = aqlib.info_gain_points
         elif f_rew == "mes":
             self.aquisition_function = aqlib.mves
+            self.aquisition_moments = aqlib.mves_moments
+            self._build_param = self._mes_param
         elif f_rew == "maxs-mes":
             self.aquisition_function = aqlib.mves_maximal_set
+            self._build_param = self._mes_param
         elif f_rew == "exp_improve":
             self.aquisition_function = aqlib.exp_improvement
+            self.aquisition_moments = aqlib.exp_improvement_moments
+            self._build_param = self._exp_improve_param
         elif f_rew == "naive":
             self.aquisition_function = aqlib.naive
             self.sample_num = 3
@@ -205,7 +326,7 @@ class Robot(object):
                 obstacle_world,
             ),
         }
-        self.path_generator = path_options[path_generator]
+        self.path_generator = _CachedPathGenerator(path_options[path_generator])
         self.path_option = path_generator
 
         self.nonmyopic = nonmyopic
@@ -219,13 +340,42 @@ class Robot(object):
         self.MIN_COLOR = MIN_COLOR
         self.MAX_COLOR = MAX_COLOR
 
-        x1vals = np.linspace(extent[0], extent[1], discretization[0])
-        x2vals = np.linspace(extent[2], extent[3], discretization[1])
-        x1, x2 = np.meshgrid(x1vals, x2vals, sparse=False, indexing="xy")
-        self.goals = np.vstack([x1.ravel(), x2.ravel()]).T
+        _, _, self.goals = _make_grid(extent, discretization[0], discretization[1])
         self.goal_only = goal_only
 
+        # Grids over the world for predicting the max and for contour plots, built once and reused
+        _, _, self._grid_30 = _make_grid(extent, 30, 30)
+        self._x1_100, self._x2_100, self._grid_100 = _make_grid(extent, 100, 100)
+
+        # The trajectory plots predict over their own, coarser grid; when animating, every timestep
+        # draws into the same figure instead of allocating a new one. That figure is rendered by Agg
+        # directly, outside of pyplot, since its frames only ever go to file
+        self._x1_viz, self._x2_viz, self._grid_viz = _make_grid(
+            extent, viz_resolution, viz_resolution
+        )
+        self._viz_fig = self._viz_ax = self._viz_im = None
+        if create_animation:
+            self._viz_fig = Figure(figsize=(8, 6))
+            FigureCanvasAgg(self._viz_fig)
+            self._viz_ax = self._viz_fig.add_subplot(111)
+
         self.obstacle_world = obstacle_world
+        # Outlines of the obstacles for plotting, read from the (static) obstacle world on first use
+        self._obstacle_xy = None
+
+        # Number of threads scoring the frontier paths, or None to score them in turn
+        self._path_workers = None
+        if parallel_paths:
+            self._path_workers = min(frontier_size, os.cpu_count() or 1)
+
+    def _mes_param(self):
+        """The aquisition function parameter for mes: the sampled max values, their locations and functions"""
+        return (self.max_val, self.max_locs, self.target)
+
+    def _exp_improve_param(self):
+        """The aquisition function parameter for exp_improve: the max values seen so far, or the running
+        max observation while no maxes have been recorded"""
+        return self.maxes if self.maxes else [self.current_max]
 
     def choose_trajectory(self, t):
         """Select the best trajectory avaliable to the robot at the current pose, according to the aquisition function.
@@ -234,7 +384,6 @@ class Robot(object):
         Output:
             either None or the (best path, best path value, all paths, all values, the max_locs for some functions)
         """
-        value = {}
         param = None
 
         max_locs = max_vals = None
@@ -263,15 +412,51 @@ class Robot(object):
 
         paths, true_paths = self.path_generator.get_path_set(self.loc)
 
+        # set params; they are the same for every path
+        if self._build_param is not None:
+            param = self._build_param()
+
+        if self._path_workers is not None:
+            # The pool only lives for this step, so no worker threads outlive the planning call
+            with ThreadPoolExecutor(max_workers=self._path_workers) as executor:
+                value = self._score_paths(t, paths, true_paths, param, executor)
+        else:
+            value = self._score_paths(t, paths, true_paths, param)
+
+        if not value:
+            return None
+
+        # Break ties between the best paths at random
+        keys = list(value.keys())
+        vals = np.fromiter(value.values(), dtype=np.float64, count=len(value))
+        tied = np.flatnonzero(vals == vals.max())
+        best_key = keys[tied[np.random.randint(len(tied))]]
+        return (
+            paths[best_key],
+            true_paths[best_key],
+            value[best_key],
+            paths,
+            value,
+            self.max_locs,
+        )
+
+    def _score_paths(self, t, paths, true_paths, param, executor=None):
+        """Compute the (cost weighted) reward of every path in the path set
+        Input:
+            t (int > 0): the current planning iteration
+            paths, true_paths (dict): the sample points and full trajectories of the paths, keyed by path
+            param: the aquisition function parameter, shared by every path
+            executor (ThreadPoolExecutor): if given, paths without a batched reward are scored in it
+        Output:
+            a dictionary of path values, keyed by path
+        """
+        value = {}
+        # Points of the paths whose reward is computed from one batched GP prediction, pending
+        # rewards of the paths scored in the thread pool, and the costs of both
+        batch_poi = {}
+        futures = {}
+        costs = {}
         for path, points in list(paths.items()):
-            # set params
-            if self.f_rew == "mes" or self.f_rew == "maxs-mes":
-                param = (self.max_val, self.max_locs, self.target)
-            elif self.f_rew == "exp_improve":
-                if len(self.maxes) == 0:
-                    param = [self.current_max]
-                else:
-                    param = self.maxes
             #  get costs
             cost = 100.0
             if self.use_cost == True:
@@ -281,13 +466,25 @@ class Robot(object):
 
             # set the points over which to determine reward
             if self.path_option == "fully_reachable_goal" and self.goal_only == True:
-                poi = [(points[-1][0], points[-1][1])]
+                poi = points[-1:, :2]
             elif self.path_option == "fully_reachable_step" and self.goal_only == True:
-                poi = [(self.goals[path][0], self.goals[path][1])]
+                poi = self.goals[path : path + 1]
             else:
                 poi = points
 
-            if self.use_cost == False:
+            if self.aquisition_moments is not None:
+                batch_poi[path] = poi[:, :2]
+                costs[path] = cost
+            elif executor is not None:
+                futures[path] = executor.submit(
+                    self.aquisition_function,
+                    time=t,
+                    xvals=poi,
+                    robot_model=self.GP,
+                    param=param,
+                )
+                costs[path] = cost
+            elif self.use_cost == False:
                 value[path] = self.aquisition_function(
                     time=t, xvals=poi, robot_model=self.GP, param=param
                 )
@@ -296,20 +493,25 @@ class Robot(object):
                     time=t, xvals=poi, robot_model=self.GP, param=param
                 )
                 value[path] = reward / cost
-        try:
-            best_key = np.random.choice(
-                [key for key in list(value.keys()) if value[key] == max(value.values())]
-            )
-            return (
-                paths[best_key],
-                true_paths[best_key],
-                value[best_key],
-                paths,
-                value,
-                self.max_locs,
-            )
-        except:
-            return None
+
+        if len(batch_poi) > 0:
+            # Predict at the points of every path at once, then score each path from its own predictions
+            predictions = self.GP.predict_value_batch(list(batch_poi.values()))
+            for path, (mu, var) in zip(batch_poi, predictions):
+                reward = self.aquisition_moments(time=t, mu=mu, var=var, param=param)[0]
+                if self.use_cost == False:
+                    value[path] = reward
+                else:
+                    value[path] = reward / costs[path]
+
+        for path, future in futures.items():
+            reward = future.result()
+            if self.use_cost == False:
+                value[path] = reward
+            else:
+                value[path] = reward / costs[path]
+
+        return value
 
     def collect_observations(self, xobs):
         """Gather noisy samples of the environment and updates the robot's GP model.
@@ -319,10 +521,11 @@ class Robot(object):
         zobs = self.sample_world(xobs)
         self.GP.add_data(xobs, zobs)
 
-        for z, x in zip(zobs, xobs):
-            if z[0] > self.current_max:
-                self.current_max = z[0]
-                self.current_max_loc = [x[0], x[1]]
+        # Only the largest new observation can raise the running max
+        index = np.argmax(zobs[:, 0])
+        if zobs[index, 0] > self.current_max:
+            self.current_max = zobs[index, 0]
+            self.current_max_loc = xobs[index, :2].copy()
 
     def predict_max(self):
         # If no observations have been collected, return default value
@@ -334,13 +537,11 @@ class Robot(object):
 
         """ Second option: generate a set of predictions from model and return max """
         # Generate a set of observations from robot model with which to predict mean
-        x1vals = np.linspace(self.ranges[0], self.ranges[1], 30)
-        x2vals = np.linspace(self.ranges[2], self.ranges[3], 30)
-        x1, x2 = np.meshgrid(x1vals, x2vals, sparse=False, indexing="xy")
-        data = np.vstack([x1.ravel(), x2.ravel()]).T
-        observations, var = self.GP.predict_value(data)
+        # The variance is not needed, so only the mean is predicted
+        observations, _ = self.GP.predict_value(self._grid_30, return_var=False)
+        index = int(np.argmax(observations))
 
-        return data[np.argmax(observations), :], np.max(observations)
+        return self._grid_30[index, :].copy(), float(observations[index, 0])
 
     def planner(self, T):
         """Gather noisy samples of the environment and updates the robot's GP model
@@ -404,10 +605,9 @@ class Robot(object):
                 ) = mcts.choose_trajectory(t=t)
 
             # Update eval metrics
-            start = self.loc
-            for m in best_path:
-                self.dist += np.sqrt((start[0] - m[0]) ** 2 + (start[1] - m[1]) ** 2)
-                start = m
+            if len(best_path) > 0:
+                pts = np.vstack([self.loc[None, :2], np.asarray(best_path)[:, :2]])
+                self.dist += np.linalg.norm(np.diff(pts, axis=0), axis=1).sum()
             self.eval.update_metrics(
                 len(self.trajectory),
                 self.GP,
@@ -425,7 +625,7 @@ class Robot(object):
                 dist=self.dist,
             )
 
-            if best_path == None:
+            if best_path is None:
                 break
             data = np.array(sampling_path)
             x1 = data[:, 0]
@@ -451,10 +651,13 @@ class Robot(object):
             # if t > 50:
             #    self.visualize_reward(screen = True, filename = 'REWARD_' + str(t), t = t)
 
-            self.loc = sampling_path[-1]
-        np.savetxt(
-            "./naive_figures/" + self.f_rew + "/robot_model.csv",
-            (self.GP.xvals[:, 0], self.GP.xvals[:, 1], self.GP.zvals[:, 0]),
+            self.loc = np.asarray(sampling_path[-1], dtype=np.float64)
+        # Saved in binary as a NUM_PTS x 3 array of (x1, x2, z) rows
+        np.save(
+            "./naive_figures/" + self.f_rew + "/robot_model.npy",
+            np.column_stack(
+                [self.GP.xvals[:, 0], self.GP.xvals[:, 1], self.GP.zvals[:, 0]]
+            ),
         )
 
     def visualize_trajectory(
@@ -478,25 +681,42 @@ class Robot(object):
         """
 
         # Generate a set of observations from robot model with which to make contour plots
-        x1vals = np.linspace(self.ranges[0], self.ranges[1], 100)
-        x2vals = np.linspace(self.ranges[2], self.ranges[3], 100)
-        x1, x2 = np.meshgrid(x1vals, x2vals, sparse=False, indexing="xy")
-        data = np.vstack([x1.ravel(), x2.ravel()]).T
+        x1, x2, data = self._x1_viz, self._x2_viz, self._grid_viz
         observations, var = self.GP.predict_value(data)
 
         # Plot the current robot model of the world
-        fig, ax = plt.subplots(figsize=(8, 6))
+        animate = self._viz_fig is not None and not screen
+        if animate:
+            # Animation frames share one figure: the world model image is updated in place and
+            # only the paths and samples of the previous frame are removed
+            fig, ax = self._viz_fig, self._viz_ax
+            for artist in list(ax.lines) + list(ax.collections):
+                artist.remove()
+            if self._viz_im is None:
+                self._viz_im = ax.imshow(
+                    observations.reshape(x1.shape),
+                    extent=self.ranges,
+                    origin="lower",
+                    aspect="auto",
+                    cmap="viridis",
+                    vmin=self.MIN_COLOR,
+                    vmax=self.MAX_COLOR,
+                )
+            else:
+                self._viz_im.set_data(observations.reshape(x1.shape))
+        else:
+            fig, ax = plt.subplots(figsize=(8, 6))
+            plot = ax.contourf(
+                x1,
+                x2,
+                observations.reshape(x1.shape),
+                cmap="viridis",
+                vmin=self.MIN_COLOR,
+                vmax=self.MAX_COLOR,
+                levels=np.linspace(self.MIN_COLOR, self.MAX_COLOR, 15),
+            )
         ax.set_xlim(self.ranges[0:2])
         ax.set_ylim(self.ranges[2:])
-        plot = ax.contourf(
-            x1,
-            x2,
-            observations.reshape(x1.shape),
-            cmap="viridis",
-            vmin=self.MIN_COLOR,
-            vmax=self.MAX_COLOR,
-            levels=np.linspace(self.MIN_COLOR, self.MAX_COLOR, 15),
-        )
         if self.GP.xvals is not None:
             scatter = ax.scatter(
                 self.GP.xvals[:, 0], self.GP.xvals[:, 1], c="k", s=20.0, cmap="viridis"
@@ -507,7 +727,7 @@ class Robot(object):
         for i, path in enumerate(self.trajectory):
             c = next(color)
             f = np.array(path)
-            plt.plot(f[:, 0], f[:, 1], c=c)
+            ax.plot(f[:, 0], f[:, 1], c=c)
 
         # If available, plot the current set of options available to robot, colored
         # by their value (red: low, yellow: high)
@@ -524,24 +744,26 @@ class Robot(object):
                 c = next(path_color)
                 points = all_paths[list(all_paths.keys())[index]]
                 f = np.array(points)
-                plt.plot(f[:, 0], f[:, 1], c=c)
+                ax.plot(f[:, 0], f[:, 1], c=c)
 
         # If available, plot the selected path in green
         if best_path is not None:
             f = np.array(best_path)
-            plt.plot(f[:, 0], f[:, 1], c="g")
+            ax.plot(f[:, 0], f[:, 1], c="g")
 
         # If available, plot the current location of the maxes for mes
         if maxes is not None:
             for coord in maxes:
-                plt.scatter(coord[0], coord[1], color="r", marker="*", s=500.0)
+                ax.scatter(coord[0], coord[1], color="r", marker="*", s=500.0)
             # plt.scatter(maxes[:, 0], maxes[:, 1], color = 'r', marker = '*', s = 500.0)
 
         # If available, plot the obstacles in the world
-        if len(self.obstacle_world.get_obstacles()) != 0:
-            for o in self.obstacle_world.get_obstacles():
-                x, y = o.exterior.xy
-                plt.plot(x, y, "r", linewidth=3)
+        if self._obstacle_xy is None:
+            self._obstacle_xy = [
+                o.exterior.xy for o in self.obstacle_world.get_obstacles()
+            ]
+        for x, y in self._obstacle_xy:
+            ax.plot(x, y, "r", linewidth=3)
 
         # Either plot to screen or save to file
         if screen:
@@ -549,49 +771,49 @@ class Robot(object):
         else:
             if not os.path.exists("./figures/" + str(self.f_rew)):
                 os.makedirs("./figures/" + str(self.f_rew))
-            fig.savefig(
+            filepath = (
                 "./figures/"
                 + str(self.f_rew)
                 + "/trajectory-N."
                 + str(filename)
                 + ".png"
             )
-            # plt.show()
-            plt.close()
+            if animate:
+                # The animation figure is kept for the next timestep
+                fig.canvas.print_png(filepath)
+            else:
+                fig.savefig(filepath)
+                # plt.show()
+                plt.close()
 
     def visualize_reward(self, screen=True, filename="REWARD", t=0):
         # Generate a set of observations from robot model with which to make contour plots
-        x1vals = np.linspace(self.ranges[0], self.ranges[1], 100)
-        x2vals = np.linspace(self.ranges[2], self.ranges[3], 100)
-        x1, x2 = np.meshgrid(
-            x1vals, x2vals, sparse=False, indexing="xy"
-        )  # dimension: NUM_PTS x NUM_PTS
-        data = np.vstack([x1.ravel(), x2.ravel()]).T
+        x1, x2, data = self._x1_100, self._x2_100, self._grid_100
 
-        if self.f_rew == "mes" or self.f_rew == "maxs-mes":
-            param = (self.max_val, self.max_locs, self.target)
-        elif self.f_rew == "exp_improve":
-            if len(self.maxes) == 0:
-                param = [self.current_max]
-            else:
-                param = self.maxes
+        if self._build_param is not None:
+            param = self._build_param()
         else:
             param = None
 
-        """
-        r = self.aquisition_function(time = t, xvals = data, robot_model = self.GP, param = param)
-        print "rewrd:", r
-        print "Shape reward:", r.shape
-        """
-
-        reward = []
-        for x in data:
-            x = x.reshape((1, 2))
-            r = self.aquisition_function(
-                time=t, xvals=x, robot_model=self.GP, param=param
+        if self.aquisition_moments is not None:
+            # Predict at every grid point at once and score each point as its own one-point path
+            mu, var = self.GP.predict_value(data)
+            reward = self.aquisition_moments(
+                time=t, mu=mu.reshape(1, -1), var=var.reshape(1, -1), param=param
             )
-            reward.append(r)
-        reward = np.array(reward)
+        elif self.aquisition_points is not None:
+            reward = self.aquisition_points(
+                time=t, xvals=data, robot_model=self.GP, param=param
+            )
+        else:
+            reward = []
+            for x in data:
+                x = x.reshape((1, 2))
+                r = self.aquisition_function(
+                    time=t, xvals=x, robot_model=self.GP, param=param
+                )
+                reward.append(r)
+            reward = np.array(reward)
 
         fig2, ax2 = plt.subplots(figsize=(8, 6))
         ax2.set_xlim(self.ranges[0:2])
@@ -632,12 +854,7 @@ class Robot(object):
             maxes (locations of largest points in the world)
         """
         # Generate a set of observations from robot model with which to make contour plots
-        x1vals = np.linspace(self.ranges[0], self.ranges[1], 100)
-        x2vals = np.linspace(self.ranges[2], self.ranges[3], 100)
-        x1, x2 = np.meshgrid(
-            x1vals, x2vals, sparse=False, indexing="xy"
-        )  # dimension: NUM_PTS x NUM_PTS
-        data = np.vstack([x1.ravel(), x2.ravel()]).T
+        x1, x2, data = self._x1_100, self._x2_100, self._grid_100
         observations, var = self.GP.predict_value(data)
 
         fig2, ax2 = plt.subplots(figsize=(8, 6))